@@ -1,7 +1,7 @@
 """Glitch Cube Conversation Agent Integration."""
 from __future__ import annotations
 
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.core import HomeAssistant
 
 DOMAIN = "glitchcube_conversation"
@@ -13,4 +13,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, ["conversation"])
\ No newline at end of file
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, ["conversation"])
+
+    # The conversation log is shared by every persona; stop it with the last one.
+    # A sibling still setting up counts too, since it may have skipped attaching.
+    if unload_ok and not any(
+        other.state in (ConfigEntryState.LOADED, ConfigEntryState.SETUP_IN_PROGRESS)
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        from .conversation import async_stop_conversation_logger
+
+        await async_stop_conversation_logger(hass)
+
+    return unload_ok
\ No newline at end of file
@@ -12,6 +12,7 @@ from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult, AbortFlow
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import aiohttp_client
 
 from .const import DOMAIN, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_TIMEOUT
 
@@ -62,16 +63,16 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     timeout = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
     
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    health_data = await response.json()
-                    return {
-                        "title": f"Glitch Cube ({host}:{port})",
-                        "version": health_data.get("version", "unknown")
-                    }
-                else:
-                    raise CannotConnect("Health check failed")
+        session = aiohttp_client.async_get_clientsession(hass)
+        async with session.get(url, timeout=timeout) as response:
+            if response.status == 200:
+                health_data = await response.json()
+                return {
+                    "title": f"Glitch Cube ({host}:{port})",
+                    "version": health_data.get("version", "unknown")
+                }
+            else:
+                raise CannotConnect("Health check failed")
     except asyncio.TimeoutError:
         raise CannotConnect("Connection timeout - ensure Glitch Cube is running")
     except aiohttp.ClientError:
@@ -95,6 +96,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             try:
                 name = user_input.get("name", "buddy")
+                # One entry per persona. Abort duplicates before validate_input
+                # so a redundant setup never pays for the health-check round trip.
                 unique_id = f"{DOMAIN}_{name}"
                 await self.async_set_unique_id(unique_id)
                 self._abort_if_unique_id_configured()
@@ -7,6 +7,7 @@ DEFAULT_HOST = "localhost"  # Fallback only - should use dynamic IP from input_t
 DEFAULT_PORT = 4567
 DEFAULT_API_PATH = "/api/v1/conversation"
 DEFAULT_TIMEOUT = 120
+DEFAULT_CONNECT_TIMEOUT = 5  # Rails is on the LAN; a slow connect means it's down
 
 # Conversation response keys
 RESPONSE_KEY = "response"
@@ -14,5 +15,6 @@ ACTIONS_KEY = "actions"
 CONTINUE_KEY = "continue_conversation"
 MEDIA_KEY = "media_actions"
 
-# Supported languages (can be expanded)
-SUPPORTED_LANGUAGES = ["en", "en-US", "en-GB"]
\ No newline at end of file
+# Supported languages (can be expanded). A tuple so nothing can mutate the shared
+# value; a frozenset would lose the order and HA's JSON encoder can't serialize it.
+SUPPORTED_LANGUAGES = ("en", "en-US", "en-GB")
\ No newline at end of file
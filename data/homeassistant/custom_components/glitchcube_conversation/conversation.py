@@ -3,16 +3,28 @@ from __future__ import annotations
 
 import aiohttp
 import asyncio
+from functools import cached_property
 import logging
+import logging.handlers
+import queue
 from typing import Any
 import os
 from pathlib import Path
 
 from homeassistant.components import conversation
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import intent
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    HomeAssistant,
+    State,
+    callback,
+)
+from homeassistant.helpers import aiohttp_client, intent
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.util import dt as dt_util
 
 from .const import (
@@ -20,6 +32,7 @@ from .const import (
     DEFAULT_HOST,
     DEFAULT_PORT,
     DEFAULT_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
     RESPONSE_KEY,
     ACTIONS_KEY,
     CONTINUE_KEY,
@@ -27,11 +40,26 @@ from .const import (
     SUPPORTED_LANGUAGES,
 )
 
+GLITCHCUBE_HOST_ENTITY = "input_text.glitchcube_host"
+
+# Spoken fallbacks when Rails' response has no usable speech
+NO_RESPONSE_TEXT = "I didn't understand that."
+UNPARSEABLE_RESPONSE_TEXT = "I had some trouble with that response."
+BLANK_RESPONSE_TEXT = "Sorry, I'm having trouble speaking right now."
+
 _LOGGER = logging.getLogger(__name__)
 
+# File writes happen on the listener's thread; the loop only enqueues records
+_LOG_LISTENER: logging.handlers.QueueListener | None = None
+_LOG_QUEUE_HANDLER: logging.handlers.QueueHandler | None = None
+_LOG_CLOSE_UNSUB: CALLBACK_TYPE | None = None
+
 # Set up dedicated file logging for conversation agent
-def setup_conversation_logger():
-    """Set up a dedicated logger for the conversation agent."""
+def setup_conversation_logger() -> logging.Handler:
+    """Build the file handler for the dedicated conversation log.
+
+    Touches the filesystem (mkdir + open), so call it from the executor.
+    """
     log_dir = Path("/config/logs")
     log_dir.mkdir(exist_ok=True)
 
@@ -44,12 +72,80 @@ def setup_conversation_logger():
     )
     file_handler.setFormatter(formatter)
 
-    _LOGGER.addHandler(file_handler)
-    _LOGGER.setLevel(logging.DEBUG)
+    return file_handler
+
+
+def _stop_log_listener(listener: logging.handlers.QueueListener) -> None:
+    """Drain the queue and close the log file.
+
+    Joins the listener thread, so call it from the executor.
+    """
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+async def async_stop_conversation_logger(hass: HomeAssistant) -> None:
+    """Detach the queued file logger and flush whatever is still queued.
+
+    The handler and module state are cleared on the loop before anything is
+    awaited, so overlapping unloads (or an unload racing HA shutdown) can't
+    both stop the same listener.
+    """
+    global _LOG_LISTENER, _LOG_QUEUE_HANDLER, _LOG_CLOSE_UNSUB
+
+    listener = _LOG_LISTENER
+    if listener is None:
+        return
+
+    if _LOG_CLOSE_UNSUB is not None:
+        _LOG_CLOSE_UNSUB()
+    _LOGGER.removeHandler(_LOG_QUEUE_HANDLER)
+    _LOG_LISTENER = None
+    _LOG_QUEUE_HANDLER = None
+    _LOG_CLOSE_UNSUB = None
+
+    await hass.async_add_executor_job(_stop_log_listener, listener)
+
+
+async def _async_setup_conversation_logger(hass: HomeAssistant) -> None:
+    """Attach the queued file logger, once for all persona entries."""
+    global _LOG_LISTENER, _LOG_QUEUE_HANDLER, _LOG_CLOSE_UNSUB
+
+    if _LOG_QUEUE_HANDLER is not None:
+        return
+
+    # Claim the slot before awaiting so entries set up concurrently don't both attach
+    log_queue = queue.SimpleQueue()
+    _LOG_QUEUE_HANDLER = logging.handlers.QueueHandler(log_queue)
+
+    try:
+        file_handler = await hass.async_add_executor_job(setup_conversation_logger)
+    except OSError as e:
+        _LOG_QUEUE_HANDLER = None
+        _LOGGER.warning("Could not open conversation log file, continuing without it: %s", e)
+        return
 
-    return _LOGGER
+    _LOG_LISTENER = logging.handlers.QueueListener(log_queue, file_handler)
+    _LOG_LISTENER.start()
+    # The file handler takes everything it's given. HA's root is WARNING without
+    # a `logger:` block, so raise us to INFO; a more verbose configured level
+    # (on this logger or the package) is left alone
+    _LOGGER.addHandler(_LOG_QUEUE_HANDLER)
+    if _LOGGER.getEffectiveLevel() > logging.INFO:
+        _LOGGER.setLevel(logging.INFO)
 
-_LOGGER = setup_conversation_logger()
+    # HA doesn't unload entries on shutdown, and the listener thread is a
+    # daemon, so flush explicitly or the last queued records are lost
+    async def _async_flush_on_close(_event: Event) -> None:
+        global _LOG_CLOSE_UNSUB
+        # listen_once has already removed itself; don't unsubscribe it again
+        _LOG_CLOSE_UNSUB = None
+        await async_stop_conversation_logger(hass)
+
+    _LOG_CLOSE_UNSUB = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_CLOSE, _async_flush_on_close
+    )
 
 
 async def async_setup_entry(
@@ -58,16 +154,30 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Glitch Cube conversation entity."""
-    entity = GlitchCubeConversationEntity(config_entry)
+    await _async_setup_conversation_logger(hass)
+
+    entity = GlitchCubeConversationEntity(hass, config_entry)
     async_add_entities([entity])
 
 
 class GlitchCubeConversationEntity(conversation.ConversationEntity):
     """Glitch Cube conversation agent."""
 
-    def __init__(self, config_entry: ConfigEntry) -> None:
+    # aiohttp never mutates the headers mapping, so one dict serves every turn
+    _HEADERS = {"Content-Type": "application/json"}
+
+    # Rails response_type -> handler method; anything else is a normal response
+    _RESPONSE_HANDLERS = {
+        "immediate_speech_with_background_tools": "_handle_immediate_speech_with_background_tools",
+        "error": "_handle_error_response",
+    }
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
         """Initialize the conversation entity."""
         self._config_entry = config_entry
+        # HA's shared session keeps connections to Rails alive between turns;
+        # HA owns its lifecycle, so we never close it ourselves.
+        self._session = aiohttp_client.async_get_clientsession(hass)
         host = config_entry.data.get("host", "")
         port = config_entry.data.get("port", DEFAULT_PORT)
         name = config_entry.data.get("name", "")
@@ -83,48 +193,72 @@ class GlitchCubeConversationEntity(conversation.ConversationEntity):
             self._api_url = None
         else:
             self._api_url = f"http://{host}:{port}/api/v1/conversation"
+        # Filled from input_text.glitchcube_host once we're added to hass
+        self._dynamic_api_url: str | None = None
+        # Production IP, used when neither of the above is available
+        self._fallback_url = f"http://192.168.0.99:{port}/api/v1/conversation"
 
         self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}"
         self._timeout = DEFAULT_TIMEOUT
+        # Fail fast on connect; no sock_read cap since Rails holds the response
+        # open while the LLM thinks — the overall deadline bounds that instead.
+        self._client_timeout = aiohttp.ClientTimeout(
+            total=self._timeout,
+            connect=DEFAULT_CONNECT_TIMEOUT,
+            sock_connect=DEFAULT_CONNECT_TIMEOUT,
+        )
 
         _LOGGER.info("Initialized Glitch Cube conversation agent: %s", self._attr_name)
 
-    @property
+    @cached_property
     def supported_languages(self) -> list[str]:
         """Return list of supported languages."""
-        return SUPPORTED_LANGUAGES
+        return list(SUPPORTED_LANGUAGES)
+
+    async def async_added_to_hass(self) -> None:
+        """Resolve the dynamic host once and follow it via state changes."""
+        await super().async_added_to_hass()
+        self._dynamic_api_url = self._build_dynamic_api_url(
+            self.hass.states.get(GLITCHCUBE_HOST_ENTITY)
+        )
+        self.async_on_remove(
+            async_track_state_change_event(
+                self.hass, [GLITCHCUBE_HOST_ENTITY], self._on_host_changed
+            )
+        )
+
+    @callback
+    def _on_host_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Refresh the cached dynamic API URL when the host helper changes."""
+        self._dynamic_api_url = self._build_dynamic_api_url(event.data["new_state"])
+
+    def _build_dynamic_api_url(self, glitchcube_host_state: State | None) -> str | None:
+        """Build the API URL from the input_text host state, if it's usable."""
+        if (not glitchcube_host_state or
+            not glitchcube_host_state.state or
+            glitchcube_host_state.state in ["unknown", "unavailable", ""]):
+            state_value = glitchcube_host_state.state if glitchcube_host_state else "None"
+            _LOGGER.debug("Dynamic host not available or invalid: %s", state_value)
+            return None
+
+        dynamic_host = glitchcube_host_state.state.strip()
+        _LOGGER.debug("Using dynamic host from input_text: %s", dynamic_host)
+        # dynamic_host may already include the port (e.g. "192.168.68.50:4567")
+        if ":" in dynamic_host:
+            return f"http://{dynamic_host}/api/v1/conversation"
+        port = self._config_entry.data.get("port", DEFAULT_PORT)
+        return f"http://{dynamic_host}:{port}/api/v1/conversation"
 
     def _get_current_api_url(self) -> str:
-        """Get the current API URL, checking for dynamic host first."""
-        try:
-            glitchcube_host_state = self.hass.states.get("input_text.glitchcube_host")
-            if (glitchcube_host_state and
-                glitchcube_host_state.state and
-                glitchcube_host_state.state not in ["unknown", "unavailable", ""]):
-
-                dynamic_host = glitchcube_host_state.state.strip()
-                # dynamic_host may already include the port (e.g. "192.168.68.50:4567")
-                if ":" in dynamic_host:
-                    api_url = f"http://{dynamic_host}/api/v1/conversation"
-                else:
-                    port = self._config_entry.data.get("port", DEFAULT_PORT)
-                    api_url = f"http://{dynamic_host}:{port}/api/v1/conversation"
-                _LOGGER.debug(f"Using dynamic host from input_text: {dynamic_host}")
-                return api_url
-            else:
-                state_value = glitchcube_host_state.state if glitchcube_host_state else "None"
-                _LOGGER.info(f"Dynamic host not available or invalid: {state_value}")
-        except Exception as e:
-            _LOGGER.warning(f"Could not read dynamic host: {e}")
+        """Get the current API URL, preferring the cached dynamic host."""
+        if self._dynamic_api_url:
+            return self._dynamic_api_url
 
         if self._api_url:
-            _LOGGER.debug(f"Using configured API URL: {self._api_url}")
             return self._api_url
 
-        port = self._config_entry.data.get("port", DEFAULT_PORT)
-        fallback_url = f"http://192.168.0.99:{port}/api/v1/conversation"
-        _LOGGER.info(f"No host configured and no dynamic host available, using fallback: {fallback_url}")
-        return fallback_url
+        _LOGGER.debug("No host configured and no dynamic host available, using fallback: %s", self._fallback_url)
+        return self._fallback_url
 
     async def _async_handle_message(
         self,
@@ -142,19 +276,18 @@ class GlitchCubeConversationEntity(conversation.ConversationEntity):
         """
         conversation_id = chat_log.conversation_id
 
-        _LOGGER.info("=" * 60)
-        _LOGGER.info("NEW CONVERSATION REQUEST")
-        _LOGGER.info("User input: %s", user_input.text)
-        _LOGGER.info("Conversation ID: %s", conversation_id)
-        _LOGGER.info("Device ID: %s", user_input.device_id)
-        _LOGGER.info("Language: %s", user_input.language)
-
         try:
             api_url = self._get_current_api_url()
-            _LOGGER.info("Using API URL: %s", api_url)
+            _LOGGER.info(
+                "conv id=%s device=%s lang=%s url=%s text=%s",
+                conversation_id,
+                user_input.device_id,
+                user_input.language,
+                api_url,
+                user_input.text,
+            )
 
             session_id = f"voice_{conversation_id}"
-            _LOGGER.info("Session ID: %s", session_id)
 
             payload = {
                 "message": user_input.text,
@@ -167,21 +300,23 @@ class GlitchCubeConversationEntity(conversation.ConversationEntity):
                     "timestamp": dt_util.utcnow().isoformat(),
                     "ha_context": {
                         "agent_id": self._attr_unique_id,
-                        "user_id": getattr(user_input, "user_id", None),
+                        # ConversationInput has no user_id; it lives on the HA Context
+                        "user_id": user_input.context.user_id,
                     }
                 }
             }
 
             _LOGGER.debug("Sending payload: %s", payload)
 
-            timeout = aiohttp.ClientTimeout(total=self._timeout)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
+            # Hard ceiling over connect + send + read
+            async with asyncio.timeout(self._timeout):
+                async with self._session.post(
                     api_url,
                     json=payload,
-                    headers={"Content-Type": "application/json"}
+                    headers=self._HEADERS,
+                    timeout=self._client_timeout,
                 ) as response:
-                    _LOGGER.info("Response status: %d", response.status)
+                    _LOGGER.debug("Response status: %d", response.status)
                     if response.status != 200:
                         raise ConversationError(f"API error: {response.status}")
 
@@ -192,20 +327,12 @@ class GlitchCubeConversationEntity(conversation.ConversationEntity):
 
                     conversation_data = result_data.get("data", {})
                     response_type = conversation_data.get("response_type", "normal")
-                    _LOGGER.info("Processing response_type: %s", response_type)
-
-                    if response_type == "immediate_speech_with_background_tools":
-                        return await self._handle_immediate_speech_with_background_tools(
-                            conversation_data, user_input, conversation_id
-                        )
-                    elif response_type == "error":
-                        return await self._handle_error_response(
-                            conversation_data, user_input, conversation_id
-                        )
-                    else:
-                        return await self._handle_normal_response(
-                            conversation_data, user_input, conversation_id
-                        )
+                    _LOGGER.debug("Processing response_type: %s", response_type)
+
+                    handler = getattr(
+                        self, self._RESPONSE_HANDLERS.get(response_type, "_handle_normal_response")
+                    )
+                    return await handler(conversation_data, user_input, conversation_id)
 
         except asyncio.TimeoutError:
             _LOGGER.error("Timeout calling Glitch Cube API")
@@ -227,19 +354,27 @@ class GlitchCubeConversationEntity(conversation.ConversationEntity):
         """Extract speech text from potentially nested response structure."""
         raw_response = conversation_data.get(RESPONSE_KEY, "")
 
-        if isinstance(raw_response, dict):
-            response_text = (
-                raw_response.get("speech", {}).get("plain", {}).get("speech") or
-                raw_response.get("response") or
-                str(raw_response.get("data", {}).get("custom_data", {}).get("claude_response", ""))[:100] or
-                "I had some trouble with that response."
-            )
+        if not isinstance(raw_response, dict):
+            # Common case: Rails sends the speech as a plain string
+            response_text = str(raw_response) if raw_response else NO_RESPONSE_TEXT
         else:
-            response_text = str(raw_response) if raw_response else "I didn't understand that."
+            speech = raw_response.get("speech")
+            plain = speech.get("plain") if isinstance(speech, dict) else None
+            response_text = plain.get("speech") if isinstance(plain, dict) else None
+
+            if not response_text:
+                response_text = raw_response.get("response")
+            if not response_text:
+                data = raw_response.get("data")
+                custom_data = data.get("custom_data") if isinstance(data, dict) else None
+                if isinstance(custom_data, dict):
+                    response_text = str(custom_data.get("claude_response", ""))[:100]
+            if not response_text:
+                response_text = UNPARSEABLE_RESPONSE_TEXT
 
         cleaned_text = response_text.strip()
         if not cleaned_text:
-            cleaned_text = "Sorry, I'm having trouble speaking right now."
+            cleaned_text = BLANK_RESPONSE_TEXT
 
         _LOGGER.debug("Extracted response text: %s", cleaned_text[:100])
         return cleaned_text
@@ -277,7 +412,10 @@ class GlitchCubeConversationEntity(conversation.ConversationEntity):
     async def _handle_normal_response(self, conversation_data, user_input, conversation_id):
         """Handle standard synchronous responses."""
         response_text = self._extract_response_text(conversation_data)
-        continue_conversation = conversation_data.get("continue_conversation", False)
+        # Rails also sends continue_delay; don't await it here. HA re-arms the
+        # mic as soon as it has the result, so sleeping would only hold the
+        # voice turn open.
+        continue_conversation = conversation_data.get(CONTINUE_KEY, False)
 
         _LOGGER.info("📢 Normal response (%s): %s...", "continue" if continue_conversation else "end", response_text[:60])
 